@@ -1,19 +1,13 @@
 # app/auth.py
 from __future__ import annotations
 
-from typing import Optional, Iterable
+from typing import Optional, Tuple
 from flask import Request
 import hmac
 
 BEARER_PREFIX = "bearer "  # case-insensitive(büyük/küçük harf duyarsız)
 
 
-def _normalize_set(values: Iterable[str] | None) -> set[str]:
-    if not values:
-        return set()
-    return {v.strip() for v in values if isinstance(v, str) and v.strip()}
-
-
 def _get_bearer_token(auth_header: str | None) -> Optional[str]:
     """RFC'ye yakın: 'Bearer <token>' biçimini boşluk sayısından bağımsız yakala."""
     if not auth_header:
@@ -39,7 +33,7 @@ def extract_token_from_headers(request: Request) -> Optional[str]:
     return alt.strip() if alt else None
 
 
-def _contains_secure(token: str, allowed: set[str]) -> bool:
+def _contains_secure(token: bytes, allowed: Tuple[bytes, ...]) -> bool:
     # timing-attack'e dayanıklı karşılaştırma
     for t in allowed:
         if hmac.compare_digest(token, t):
@@ -49,11 +43,13 @@ def _contains_secure(token: str, allowed: set[str]) -> bool:
 
 def is_authorized(
     token: Optional[str],
-    api_secret_tokens: Iterable[str] | set[str],
-    api_keys: Iterable[str] | set[str],
+    api_secret_tokens: Tuple[bytes, ...],
+    api_keys: Tuple[bytes, ...],
 ) -> bool:
+    """Token'ları Config'in import sırasında encode ettiği byte tuple'larıyla
+    karşılaştırır (Config.API_SECRET_TOKENS_BYTES / API_KEYS_BYTES);
+    istek başına normalize/encode yapılmaz."""
     if not token:
         return False
-    secrets = _normalize_set(api_secret_tokens)
-    keys = _normalize_set(api_keys)
-    return _contains_secure(token, secrets) or _contains_secure(token, keys)
+    token_b = token.encode("utf-8")
+    return _contains_secure(token_b, api_secret_tokens) or _contains_secure(token_b, api_keys)
@@ -1,16 +1,19 @@
 import os
-from typing import List, Set
+from typing import Dict, List, Set, Tuple
 from dotenv import load_dotenv
 
 # .env dosyasını yükle
 load_dotenv()
 
 
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
 def _env_bool(key: str, default: bool) -> bool:
     val = os.getenv(key)
     if val is None:
         return default
-    return val.strip().lower() in {"1", "true", "yes", "on"}
+    return val.strip().lower() in _TRUTHY
 
 
 class Config:
@@ -36,6 +39,11 @@ class Config:
         if t.strip()
     ]
 
+    # Yetkilendirme sıcak yolu için bir kez encode edilmiş token byte'ları
+    # (istek başına strip/encode/set kurulumunu önler)
+    API_SECRET_TOKENS_BYTES: Tuple[bytes, ...] = tuple(t.encode("utf-8") for t in API_SECRET_TOKENS)
+    API_KEYS_BYTES: Tuple[bytes, ...] = tuple(t.encode("utf-8") for t in API_KEYS)
+
     # Tahmin frekansları
     ALLOWED_FREQUENCIES: Set[str] = {"weekly", "monthly"}
     DEFAULT_PREDICTION_FREQUENCY: str = os.getenv("DEFAULT_PREDICTION_FREQUENCY", "weekly")
@@ -47,20 +55,26 @@ class Config:
     # Veri ve performans
     MIN_DATA_POINTS: int = int(os.getenv("MIN_DATA_POINTS", "30"))  # post-aggregation
     REQUEST_TIMEOUT_SECONDS: int = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "300"))
+    MODEL_CACHE_ENABLED: bool = _env_bool("MODEL_CACHE_ENABLED", True)  # aynı seri için fit cache'i
 
     # Çıkış davranışları
     RETURN_CONFIDENCE_DEFAULT: bool = _env_bool("RETURN_CONFIDENCE_DEFAULT", False) # burayı sor?
     NON_NEGATIVE_PREDICTIONS: bool = _env_bool("NON_NEGATIVE_PREDICTIONS", True) # burayı sor?
     BACKTEST_POINTS: int = int(os.getenv("BACKTEST_POINTS", "12"))
+    ENABLE_BACKTEST: bool = _env_bool("ENABLE_BACKTEST", False)  # hold-out backtest (ikinci fit); kapalıyken in-sample metrik
 
     # Callback konfigürasyonu
     CALLBACK_API_KEY: str = os.getenv("CALLBACK_API_KEY", "")  # Callback'e gönderilecek API key, burayı sor?
     CALLBACK_TIMEOUT: int = int(os.getenv("CALLBACK_TIMEOUT", "30"))  # Callback timeout saniye, burayı sor?
+    CALLBACK_WORKERS: int = int(os.getenv("CALLBACK_WORKERS", "4"))  # Callback havuzundaki worker sayısı
+
+    # Frekans -> resample kuralı (import sırasında bir kez hesaplanır;
+    # freq_to_rule her istekte koşul dallanması yerine tek dict lookup yapar)
+    _FREQ_RULES: Dict[str, str] = {"weekly": WEEKLY_RULE, "monthly": MONTHLY_RULE}
 
     @classmethod
     def freq_to_rule(cls, freq: str) -> str:
-        if freq == "weekly":
-            return cls.WEEKLY_RULE
-        if freq == "monthly":
-            return cls.MONTHLY_RULE
-        raise ValueError(f"Unsupported frequency: {freq}")
+        try:
+            return cls._FREQ_RULES[freq]
+        except KeyError:
+            raise ValueError(f"Unsupported frequency: {freq}")
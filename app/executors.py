@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import Config
+
+# Callback işleri için tek, sınırlı havuz. İstek başına thread açmak yerine
+# (her thread ~8 MB stack) worker sayısını CALLBACK_WORKERS ile sınırlar;
+# taşan işler havuz kuyruğunda bekler.
+CALLBACK_EXECUTOR = ThreadPoolExecutor(
+    max_workers=Config.CALLBACK_WORKERS,
+    thread_name_prefix="cb",
+)
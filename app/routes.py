@@ -1,18 +1,43 @@
 from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
+import orjson
 import requests
-import threading
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from flask import Blueprint, current_app, jsonify, request
 
 from .auth import extract_token_from_headers, is_authorized
+from .config import Config
+from .executors import CALLBACK_EXECUTOR
 from .services.pipeline import build_pipeline
+from .services.preprocess import detect_columns_from_keys
 
 
 api_bp = Blueprint("api", __name__)
 
+# Her istekte current_app proxy'sine gitmemek için import sırasında sabitle
+_MIN_DATA_POINTS: int = Config.MIN_DATA_POINTS
+
+# Callback POST'ları için kalıcı session: TCP/TLS el sıkışmasını bağlantı
+# havuzuyla amortize eder, geçici hatalarda kısa backoff ile yeniden dener
+_CALLBACK_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+)
+CALLBACK_SESSION = requests.Session()
+CALLBACK_SESSION.mount("https://", _CALLBACK_ADAPTER)
+CALLBACK_SESSION.mount("http://", _CALLBACK_ADAPTER)
+
+# Callback benzeri parametre isimleri (tek sefer kurulan frozenset)
+_CALLBACK_KEYS = frozenset({"callback", "webhook", "notify", "async", "background"})
+
+# Desteklenen tahmin frekansları
+_FREQUENCIES = frozenset({"weekly", "monthly"})
+
 
 def _bad_request(message: str, error_code: str = "bad_request"):
     return jsonify({"error": error_code, "message": message}), 400
@@ -29,12 +54,15 @@ def _unprocessable(message: str, error_code: str = "unprocessable_entity"):
 @api_bp.route("/predict", methods=["POST"])
 def predict():
     # token = extract_token_from_headers(request)
-    # if not is_authorized(token, current_app.config["API_SECRET_TOKENS"], current_app.config["API_KEYS"]):
+    # if not is_authorized(token, Config.API_SECRET_TOKENS_BYTES, Config.API_KEYS_BYTES):
     #     return _unauthorized("Geçersiz veya eksik API anahtarı.")
 
     try:
-        payload: Dict[str, Any] = request.get_json(force=True, silent=False)  # raise if not JSON
-    except Exception:
+        # orjson C tarafında parse eder; cache=False ile Flask ham gövdeyi tutmaz
+        payload: Dict[str, Any] = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return _bad_request("Geçersiz JSON gövdesi.")
+    if not isinstance(payload, dict):
         return _bad_request("Geçersiz JSON gövdesi.")
 
     data: Optional[List[Dict[str, Any]]] = payload.get("data")
@@ -42,21 +70,29 @@ def predict():
     prediction_frequency: Optional[str] = payload.get("prediction_frequency")
     feature_columns: Optional[List[str]] = payload.get("feature_columns")
     confidence_interval: bool = bool(payload.get("confidence_interval", False))
+    # Opt-in kolon-bazlı yanıt: predictions {"date": [...], "predicted_value": [...]}
+    # olarak döner (varsayılan kayıt listesi korunur — geriye uyumlu)
+    columnar_output: bool = payload.get("response_format") == "columnar"
 
     if data is None or not isinstance(data, list) or len(data) == 0:
         return _bad_request("'data' zorunludur ve boş olmamalıdır.", "missing_parameter")
     if prediction_period is None or not isinstance(prediction_period, int) or prediction_period <= 0:
         return _bad_request("'prediction_period' zorunludur ve pozitif bir sayı olmalıdır.", "missing_parameter")
-    if not prediction_frequency or prediction_frequency not in {"weekly", "monthly"}:
+    if not prediction_frequency or prediction_frequency not in _FREQUENCIES:
         return _bad_request("'prediction_frequency' zorunludur ve 'weekly'/'monthly' olmalıdır.", "missing_parameter")
 
-    # Callback benzeri parametre kontrolü 
+    # Hızlı şema ön-kontrolü: DataFrame kurmadan ilk kaydın alan adlarına bak.
+    # Tarih için değer bazlı fallback pipeline'da mevcut; hedef kolon alias'ı
+    # hiç yoksa O(N) frame kurulumuna girmeden 400 dön.
+    first = data[0]
+    if not isinstance(first, dict):
+        return _bad_request("'data' kayıtları nesne (dict) olmalıdır.", "invalid_data")
+    if detect_columns_from_keys(first.keys())["target"] is None:
+        return _bad_request("Veri kayıtlarında hedef (satış) kolonu bulunamadı.", "invalid_data")
+
+    # Callback benzeri parametre kontrolü
     # burayı sor?
-    callback_url = None
-    for key, value in payload.items():
-        if key.lower() in ['callback', 'webhook', 'notify', 'async', 'background']:
-            callback_url = value
-            break
+    callback_url = next((v for k, v in payload.items() if k.lower() in _CALLBACK_KEYS), None)
 
     if callback_url:
         # Callback varsa hemen 200 dön
@@ -69,12 +105,15 @@ def predict():
             "callback_url": callback_url
         }
         
+        # Worker thread'de current_app proxy'si çalışmaz; değeri burada yakala
+        callback_api_key = current_app.config.get("CALLBACK_API_KEY", "")
+
         # Arka planda callback'e sonucu gönder
         def send_callback():
             try:
                 # API key header'ı ile callback'e POST
                 headers = {
-                    "X-API-Key": current_app.config.get("CALLBACK_API_KEY", ""),
+                    "X-API-Key": callback_api_key,
                     "Content-Type": "application/json",
                     "X-Request-ID": request_id
                 }
@@ -86,12 +125,13 @@ def predict():
                     prediction_period=prediction_period,
                     feature_columns=feature_columns or [],
                     return_confidence=confidence_interval,
-                    min_data_points=current_app.config["MIN_DATA_POINTS"],
+                    min_data_points=_MIN_DATA_POINTS,
+                    columnar_output=columnar_output,
                 )
                 result = pipeline.run(data)
                 
-                # Sonucu callback URL'e gönder
-                requests.post(callback_url, json=result, headers=headers, timeout=30)
+                # Sonucu callback URL'e gönder (gövde orjson ile serialize edilir)
+                CALLBACK_SESSION.post(callback_url, data=orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY), headers=headers, timeout=30)
                 
             except Exception as e:
                 # Hata durumunda da callback'e bilgi gönder
@@ -102,12 +142,12 @@ def predict():
                     "status": "failed"
                 }
                 try:
-                    requests.post(callback_url, json=error_data, headers=headers, timeout=30)
+                    CALLBACK_SESSION.post(callback_url, data=orjson.dumps(error_data), headers=headers, timeout=30)
                 except:
                     pass  # Callback'e hata gönderilemezse sessizce devam et
         
-        # Arka planda çalıştır
-        threading.Thread(target=send_callback, daemon=True).start()
+        # Arka planda çalıştır (sınırlı havuz: istek başına thread yok)
+        CALLBACK_EXECUTOR.submit(send_callback)
         
         return jsonify(response_data), 200
 
@@ -119,7 +159,8 @@ def predict():
         prediction_period=prediction_period,
         feature_columns=feature_columns or [],
         return_confidence=confidence_interval,
-        min_data_points=current_app.config["MIN_DATA_POINTS"],
+        min_data_points=_MIN_DATA_POINTS,
+        columnar_output=columnar_output,
     )
 
     try:
@@ -129,4 +170,5 @@ def predict():
     except Exception as ex:
         return jsonify({"error": "internal_error", "message": str(ex)}), 500
 
-    return jsonify(result), 200
+    # Büyük predictions listesi için jsonify yerine orjson ile serialize et
+    return current_app.response_class(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY), mimetype="application/json"), 200
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from .preprocess import (
@@ -14,20 +15,6 @@ from .preprocess import (
 from .predictor import EnsembleForecaster
 
 
-def _to_iso_date(value: Any) -> str:
-    if value is None:
-        return None
-    if isinstance(value, (pd.Timestamp, )):
-        return value.date().isoformat()
-    try:
-        ts = pd.to_datetime(value)
-        return ts.date().isoformat()
-    except Exception:
-        s = str(value).strip()
-        # kaba bir güvenli fallback
-        return s[:10]
-
-
 @dataclass
 class PredictionPipeline:
     prediction_frequency: str          # "weekly" | "monthly"
@@ -39,9 +26,19 @@ class PredictionPipeline:
     weekly_rule: str = "W-MON"         # tek ankraj: Pazartesi
     monthly_rule: str = "MS"           # tek ankraj: Ay başı
     non_negative: bool = True          # negatif tahminleri kırp
+    columnar_output: bool = False      # predictions'ı dict-of-arrays döndür (orjson numpy ile serialize eder)
 
     def run(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
-        df = pd.DataFrame.from_records(records)
+        if not records:
+            raise ValueError("Boş veri kümesi")
+
+        # from_records yerine kolon-bazlı kurulum: tek O(N) geçişte tipli,
+        # bitişik kolonlar üretir (şema ilk kayıttan okunur)
+        cols: Dict[str, List[Any]] = {k: [] for k in records[0].keys()}
+        for r in records:
+            for k, lst in cols.items():
+                lst.append(r.get(k))
+        df = pd.DataFrame(cols, copy=False)
         if df.empty:
             raise ValueError("Boş veri kümesi")
 
@@ -94,32 +91,44 @@ class PredictionPipeline:
             "features_used": features_used,
         }
 
-        # 7) Tahminleri normalize et (ISO tarih, negatif klip)
-        preds: List[Dict[str, Any]] = []
+        # 7) Tahminleri normalize et (ISO tarih, negatif klip) — vektörel
+        preds: Any = {"date": [], "predicted_value": []} if self.columnar_output else []
         if not forecast_df.empty:
-            # sıralı dön
-            forecast_df = forecast_df.sort_values("ds")
-            for _, row in forecast_df.iterrows():
-                yhat = float(row.get("yhat", 0.0))
-                lo = row.get("yhat_lower", None)
-                hi = row.get("yhat_upper", None)
-
+            # fit_predict ds'e göre sıralı döndürür; burada yeniden sıralanmaz
+            assert forecast_df["ds"].is_monotonic_increasing
+            ds = forecast_df["ds"].dt.strftime("%Y-%m-%d").to_numpy()
+            yh = forecast_df["yhat"].to_numpy(dtype=np.float64)
+            if self.non_negative:
+                yh = np.maximum(yh, 0.0)
+
+            # forecaster lo/hi kolonlarını yalnızca return_confidence ile üretir
+            lo = hi = None
+            if self.return_confidence:
+                lo = forecast_df["yhat_lower"].to_numpy(dtype=np.float64)
+                hi = forecast_df["yhat_upper"].to_numpy(dtype=np.float64)
                 if self.non_negative:
-                    yhat = max(0.0, yhat)
-                    if lo is not None:
-                        lo = max(0.0, float(lo))
-                    if hi is not None:
-                        hi = max(0.0, float(hi))
-
-                item = {
-                    "date": _to_iso_date(row.get("ds")),
-                    "predicted_value": yhat,
-                }
-                if self.return_confidence and {"yhat_lower", "yhat_upper"}.issubset(forecast_df.columns):
-                    item["confidence_lower"] = lo if lo is not None else None
-                    item["confidence_upper"] = hi if hi is not None else None
-
-                preds.append(item)
+                    lo = np.maximum(lo, 0.0)
+                    hi = np.maximum(hi, 0.0)
+
+            if self.columnar_output:
+                # Satır başına dict üretmeden kolonları doğrudan ver;
+                # float dizileri numpy olarak kalır (OPT_SERIALIZE_NUMPY)
+                preds = {"date": ds.tolist(), "predicted_value": yh}
+                if self.return_confidence:
+                    preds["confidence_lower"] = lo
+                    preds["confidence_upper"] = hi
+            elif self.return_confidence:
+                preds = [
+                    {
+                        "date": d,
+                        "predicted_value": float(v),
+                        "confidence_lower": float(l),
+                        "confidence_upper": float(h),
+                    }
+                    for d, v, l, h in zip(ds, yh, lo, hi)
+                ]
+            else:
+                preds = [{"date": d, "predicted_value": float(v)} for d, v in zip(ds, yh)]
 
         # 8) model_info normalize (etiket)
         mi = model_info.copy() if isinstance(model_info, dict) else {}
@@ -150,6 +159,7 @@ def build_pipeline(
     weekly_rule: str = "W-MON",
     monthly_rule: str = "MS",
     non_negative: bool = True,
+    columnar_output: bool = False,
 ) -> PredictionPipeline:
     return PredictionPipeline(
         prediction_frequency=prediction_frequency,
@@ -161,4 +171,5 @@ def build_pipeline(
         weekly_rule=weekly_rule,
         monthly_rule=monthly_rule,
         non_negative=non_negative,
+        columnar_output=columnar_output,
     )
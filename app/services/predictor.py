@@ -1,11 +1,69 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, Tuple
 
 import pandas as pd
 from prophet import Prophet
 
+from ..config import Config
+
+# Fit edilmiş Prophet modelleri için LRU cache: aynı toplulaştırılmış seri
+# tekrar geldiğinde (sabit tarihsel veriyle sık olur) fit maliyeti atlanır.
+# MODEL_CACHE_ENABLED=false ile kapatılabilir.
+_MODEL_CACHE: "OrderedDict[bytes, Prophet]" = OrderedDict()
+_MODEL_CACHE_MAX = 64
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Ana fit + backtest fit birbirinden bağımsız; Stan fit'i GIL'i bıraktığı
+# için ikisi bu ortak havuzda paralel koşturulur (istek başına havuz kurulmaz)
+_FIT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prophet-fit")
+
+
+def _fit_model(df: pd.DataFrame) -> Prophet:
+    # Prophet/Stan float64 bekler; preprocess y'yi float32 taşır
+    if df["y"].dtype != "float64":
+        df = df.assign(y=df["y"].astype("float64"))
+    model = Prophet(
+        weekly_seasonality=True,
+        yearly_seasonality=True,
+        daily_seasonality=False,
+    )
+    model.fit(df)
+    return model
+
+
+def _series_key(df: pd.DataFrame) -> bytes:
+    # Fit sadece (ds, y) çiftlerine bağlı; frekans yalnızca predict'i etkiler
+    h = hashlib.blake2b(digest_size=16)
+    h.update(df["ds"].to_numpy(dtype="datetime64[ns]").tobytes())
+    h.update(df["y"].to_numpy(dtype="float64").tobytes())
+    return h.digest()
+
+
+def _fit_model_cached(df: pd.DataFrame) -> Prophet:
+    if not Config.MODEL_CACHE_ENABLED:
+        return _fit_model(df)
+
+    key = _series_key(df)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return model
+
+    model = _fit_model(df)
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[key] = model
+        if len(_MODEL_CACHE) > _MODEL_CACHE_MAX:
+            _MODEL_CACHE.popitem(last=False)
+    return model
+
+
 @dataclass
 class EnsembleForecaster:
     frequency: str                 # 'weekly' | 'monthly'
@@ -21,39 +79,48 @@ class EnsembleForecaster:
         return self.weekly_rule
 
     def fit_predict(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict, Dict]:
-        # Prophet baseline
-        model = Prophet(
-            weekly_seasonality=True,
-            yearly_seasonality=True,
-            daily_seasonality=False,
-        )
-        model.fit(df.rename(columns={"ds": "ds", "y": "y"}))
+        n_val = max(0, min(max(4, self.horizon), max(2, len(df) // 3)))
+        has_metrics = len(df) >= n_val + 5 and n_val >= 2
+        do_backtest = has_metrics and Config.ENABLE_BACKTEST
+
+        # Prophet baseline (aynı seri için cache'ten gelir); backtest açıksa
+        # iki bağımsız fit havuzda paralel koşar
+        bt_model = None
+        if do_backtest:
+            train_df = df.iloc[:-n_val]
+            f_main = _FIT_POOL.submit(_fit_model_cached, df)
+            f_bt = _FIT_POOL.submit(_fit_model_cached, train_df)
+            model = f_main.result()
+            bt_model = f_bt.result()
+        else:
+            model = _fit_model_cached(df)
 
         # Gelecek veri çerçevesi: tek ankraj
         rule = self._freq_rule()
         future = model.make_future_dataframe(periods=self.horizon, freq=rule, include_history=False)
         forecast = model.predict(future)
-        cols = ["ds", "yhat", "yhat_lower", "yhat_upper"]
-        out = forecast[cols].copy()
+        # Prophet ~20 kolon döndürür; gerekenleri en baştan seç,
+        # lo/hi yalnızca istenirse taşınır
+        cols = ["ds", "yhat"] + (["yhat_lower", "yhat_upper"] if self.return_confidence else [])
+        out = forecast.loc[:, cols]
 
-        # Basit backtest (son n nokta)
+        # Doğruluk metrikleri (son n nokta)
         metrics = {"mae": None, "rmse": None, "mape": None}
-        n_val = max(0, min(max(4, self.horizon), max(2, len(df) // 3)))
-        if len(df) >= n_val + 5 and n_val >= 2:
-            train_df = df.iloc[:-n_val].copy()
-            val_df = df.iloc[-n_val:].copy()
+        if has_metrics:
+            if do_backtest:
+                # Hold-out backtest: ikinci fit yukarıda paralel yapıldı
+                val_df = df.iloc[-n_val:]
 
-            bt_model = Prophet(
-                weekly_seasonality=True,
-                yearly_seasonality=True,
-                daily_seasonality=False,
-            )
-            bt_model.fit(train_df.rename(columns={"ds": "ds", "y": "y"}))
+                bt_future = bt_model.make_future_dataframe(periods=n_val, freq=rule, include_history=False)
+                bt_forecast = bt_model.predict(bt_future)[["ds", "yhat"]]
 
-            bt_future = bt_model.make_future_dataframe(periods=n_val, freq=rule, include_history=False)
-            bt_forecast = bt_model.predict(bt_future)[["ds", "yhat"]]
+                merged = val_df.merge(bt_forecast, on="ds", how="inner")
+            else:
+                # Varsayılan: ana modelin in-sample rezidüelleri — ikinci fit yok,
+                # istek başına fit maliyetini yarıya indirir
+                insample = model.predict(df[["ds"]].iloc[-n_val:])[["ds", "yhat"]]
+                merged = df.iloc[-n_val:].merge(insample, on="ds", how="inner")
 
-            merged = val_df.merge(bt_forecast, on="ds", how="inner")
             if len(merged) >= 2:
                 y_true = merged["y"].astype(float)
                 y_pred = merged["yhat"].astype(float)
@@ -78,8 +145,5 @@ class EnsembleForecaster:
             "features_used": ["trend", "weekly_seasonality", "yearly_seasonality"],
         }
 
-        if not self.return_confidence:
-            out = out.drop(columns=["yhat_lower", "yhat_upper"])
-
         # Sadece ileri dönemleri döndürdüğümüzden emin ol (include_history=False zaten yeterli)
         return out.sort_values("ds").reset_index(drop=True), model_info, data_summary
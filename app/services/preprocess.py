@@ -1,48 +1,72 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
+import numpy as np
 import pandas as pd
 
-DATE_CANDIDATES = [
+# Alias sırası öncelik belirler (tuple: import sırasında bir kez kurulur)
+DATE_CANDIDATES = (
     "tarih", "date", "gun", "day", "zaman", "time",
-]
+)
 
-TARGET_CANDIDATES = [
+TARGET_CANDIDATES = (
     "satis", "sales", "miktar", "quantity", "adet", "amount", "value", "satis_miktari",
-]
+)
+
+# Desteklenen toplama seviyeleri (çağrı başına set literali kurmamak için)
+_LEVELS = frozenset({"weekly", "monthly"})
+
+
+def detect_columns_from_keys(keys: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Yalnızca alan adlarına bakarak tarih/hedef kolonlarını eşler.
+
+    DataFrame kurulmadan önce (örn. HTTP katmanında) ucuz ön-doğrulama
+    sağlar; bulunamayan kolonlar None döner — değer bazlı tarih fallback'i
+    `detect_columns`'tadır.
+    """
+    lower_map = {str(k).lower(): k for k in keys}
+    return {
+        "date": next((lower_map[a] for a in DATE_CANDIDATES if a in lower_map), None),
+        "target": next((lower_map[a] for a in TARGET_CANDIDATES if a in lower_map), None),
+    }
 
 
 def detect_columns(df: pd.DataFrame) -> Dict[str, str]:
     """Tarih ve hedef kolonlarını akıllı tespit eder."""
-    lower_map = {c.lower(): c for c in df.columns}
-
-    def find(candidates: List[str], is_date: bool = False) -> str:
-        # 1) alias eşleşmesi
-        for alias in candidates:
-            if alias in lower_map:
-                return lower_map[alias]
-        # 2) tarih için fallback: datetime parse edilebilen ilk kolon
-        if is_date:
-            for c in df.columns:
-                try:
-                    pd.to_datetime(df[c])
-                    return c
-                except Exception:
-                    continue
+    detected = detect_columns_from_keys(df.columns)
+    date_col = detected["date"]
+    if date_col is None:
+        # fallback: kolonun tamamı yerine ilk birkaç null-olmayan değeri parse et
+        for c in df.columns:
+            sample = df[c].dropna().head(3)
+            if sample.empty:
+                continue
+            try:
+                pd.to_datetime(sample, errors="raise")
+                date_col = c
+                break
+            except Exception:
+                continue
+
+    target_col = detected["target"]
+
+    if date_col is None or target_col is None:
         raise ValueError("Zorunlu kolon bulunamadı")
-
-    date_col = find(DATE_CANDIDATES, is_date=True)
-    target_col = find(TARGET_CANDIDATES, is_date=False)
     return {"date": date_col, "target": target_col}
 
 
 def normalize_schema(df: pd.DataFrame, mapping: Dict[str, str], feature_columns: List[str]) -> pd.DataFrame:
-    out = df.copy()
-    out = out.rename(columns={mapping["date"]: "ds", mapping["target"]: "y"})
-    out["ds"] = pd.to_datetime(out["ds"], errors="coerce")
+    # rename zaten yeni bir frame döndürür; öncesinde tam kopyaya gerek yok
+    out = df.rename(columns={mapping["date"]: "ds", mapping["target"]: "y"})
+    # cache=True: tekrarlanan tarih string'leri (toplama öncesi sık) bir kez parse edilir
+    out["ds"] = pd.to_datetime(out["ds"], errors="coerce", cache=True)
+    # float32: satış verisi için yeterli hassasiyet, vektörel geçişlerde
+    # bellek bant genişliğini yarılar (Prophet sınırında float64'e çevrilir)
+    out["y"] = pd.to_numeric(out["y"], errors="coerce").astype(np.float32)
     out = out.dropna(subset=["ds", "y"])
     kept = [c for c in (feature_columns or []) if c in out.columns]
-    return out[["ds", "y", *kept]].sort_values("ds").reset_index(drop=True)
+    # sort yok: tüketici aggregate_time_series'in resample'ı sıralı çıktı üretir
+    return out[["ds", "y", *kept]].reset_index(drop=True)
 
 
 def aggregate_time_series(
@@ -56,14 +80,17 @@ def aggregate_time_series(
     - weekly: Pazartesi başlangıç (W-MON)
     - monthly: Ay başı (MS)
     """
-    if level not in {"weekly", "monthly"}:
+    if level not in _LEVELS:
         raise ValueError("Geçersiz aggregation_level")
-    out = df.copy()
-    out["ds"] = pd.to_datetime(out["ds"])
+    # normalize_schema sonrası ds zaten datetime64; değilse (bağımsız çağrı) çevir
+    ds = df["ds"]
+    if not pd.api.types.is_datetime64_any_dtype(ds):
+        ds = pd.to_datetime(ds)
     rule = weekly_rule if level == "weekly" else monthly_rule
-    grouped = out.set_index("ds")["y"].resample(rule).sum().reset_index()
-    grouped.columns = ["ds", "y"]
-    return grouped.sort_values("ds").reset_index(drop=True)
+    # Ara DataFrame kurmadan çıplak Series üzerinden resample;
+    # resample çıktısı zaten ds'e göre sıralıdır, ek sort gerekmez
+    s = pd.Series(df["y"].to_numpy(), index=pd.DatetimeIndex(ds)).resample(rule).sum()
+    return pd.DataFrame({"ds": s.index, "y": s.to_numpy()}, copy=False)
 
 
 def sanitize_outliers_and_missing(df: pd.DataFrame) -> pd.DataFrame:
@@ -71,37 +98,41 @@ def sanitize_outliers_and_missing(df: pd.DataFrame) -> pd.DataFrame:
     - Eksik zaman noktalarını frekansına göre doldurur.
     - IQR clipping ile aykırı değerleri sınırlar.
     """
-    out = df.copy()
-    if len(out) < 2:
-        return out
+    if len(df) < 2:
+        return df
 
-    out["ds"] = pd.to_datetime(out["ds"])
-    inferred = pd.infer_freq(out["ds"])
+    if not pd.api.types.is_datetime64_any_dtype(df["ds"]):
+        df = df.assign(ds=pd.to_datetime(df["ds"]))
+    inferred = pd.infer_freq(df["ds"])
     if not inferred:
-        inferred = _infer_by_gap(out)  # haftalıkta W-MON'a yönelir
+        inferred = _infer_by_gap(df)  # haftalıkta W-MON'a yönelir
 
-    full_index = pd.date_range(start=out["ds"].min(), end=out["ds"].max(), freq=inferred)
-    out = out.set_index("ds").reindex(full_index)
+    full_index = pd.date_range(start=df["ds"].min(), end=df["ds"].max(), freq=inferred)
+    # reindex yeni bir frame döndürür; girişin ayrıca kopyalanması gerekmez
+    out = df.set_index("ds").reindex(full_index)
     out.index.name = "ds"
 
-    # basit imputasyon
-    out["y"] = out["y"].ffill().bfill()
-
-    # IQR clipping
-    q1, q3 = out["y"].quantile(0.25), out["y"].quantile(0.75)
+    # basit imputasyon + IQR clipping, numpy ile tek geçişler halinde
+    # (dtype korunur: normalize_schema'dan float32 gelir)
+    y = out["y"].ffill().bfill().to_numpy()
+    q1, q3 = np.quantile(y, (0.25, 0.75))
     iqr = q3 - q1
-    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
-    out["y"] = out["y"].clip(lower=lower, upper=upper)
+    # np.quantile float64 skaler döndürür; sınırları y.dtype'a çevirmeden
+    # clip'lemek NumPy 2 promotion kurallarıyla sonucu float64'e terfi ettirir
+    lower = y.dtype.type(q1 - 1.5 * iqr)
+    upper = y.dtype.type(q3 + 1.5 * iqr)
+    out["y"] = np.clip(y, lower, upper)
 
     return out.reset_index().rename(columns={"index": "ds"})
 
 
 def _infer_by_gap(df: pd.DataFrame) -> str:
     """Aralıktan frekans çıkarımı: haftalıkta W-MON varsayılanına yönel."""
-    deltas = df["ds"].diff().dropna()
-    if len(deltas) == 0:
+    # Timedelta Series kurmak yerine gün bazında int64 diff + median
+    ds = df["ds"].to_numpy(dtype="datetime64[D]")
+    if len(ds) < 2:
         return "W-MON"
-    median_days = deltas.median().days
+    median_days = float(np.median(np.diff(ds).astype("int64")))
     if median_days >= 25:
         return "MS"
     if median_days >= 6: